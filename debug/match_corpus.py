@@ -0,0 +1,202 @@
+"""
+Replay recorded query -> candidates -> expected winner cases through the matching rules offline.
+Play cases hold the first page of search results and, when play had to page further, the
+deeper results so the decision to search deeper is replayed too.
+
+1. Run script with spock installed: python debug/match_corpus.py run
+2. Read accuracy and p50/p99 latency for play and device matching
+3. Add cases with `record QUERY` or `record-device QUERY` (needs spock auth), then check the expected winner by hand
+
+Pass --min-accuracy to exit with an error when accuracy drops below a floor.
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+import click
+
+from spock.interface import Spock
+from spock.match import best_device, pick
+from spock.record import Record
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "match_corpus.json")
+ALL_TYPES = ["playlist", "artist", "album", "track"]
+
+
+def load_corpus(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_corpus(path, corpus):
+    with open(path, "w") as file:
+        json.dump(corpus, file, indent=2, ensure_ascii=False)
+        file.write("\n")
+
+
+def time_case(match, query, candidates, repeat):
+    """
+    :return: (winner, per call latencies in microseconds)
+    """
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        winner = match(query, candidates)
+        latencies.append((time.perf_counter_ns() - start) / 1000)
+    return winner, latencies
+
+
+def report(kind, cases, match, key, repeat):
+    """
+    Print accuracy, misses and latency percentiles for one kind of case
+    :return: number of correct cases
+    """
+    correct = 0
+    latencies = []
+    for query, candidates, expected in cases:
+        winner, case_latencies = time_case(match, query, candidates, repeat)
+        latencies.extend(case_latencies)
+        actual = key(winner) if winner is not None else None
+        if actual == expected:
+            correct += 1
+        else:
+            print(f"  miss {kind} '{query}': expected {expected}, got {actual}")
+
+    if latencies:
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p99 = percentiles[49], percentiles[98]
+    else:
+        p50 = p99 = 0
+    print(
+        f"{kind}: {correct}/{len(cases)} correct, "
+        f"p50 {p50:.1f}us, p99 {p99:.1f}us over {len(latencies)} calls"
+    )
+    return correct
+
+
+@click.group()
+def corpus():
+    pass
+
+
+@corpus.command()
+@click.option("--path", default=CORPUS_PATH, type=click.Path(exists=True))
+@click.option("--repeat", default=100, type=click.IntRange(1))
+@click.option("--min-accuracy", type=click.FloatRange(0, 1))
+def run(path, repeat, min_accuracy=None):
+    cases = load_corpus(path)
+    play_cases = [
+        (
+            x["query"],
+            (
+                [Record(**c) for c in x["candidates"]],
+                [Record(**c) for c in x.get("deeper", [])],
+            ),
+            x["expected"],
+        )
+        for x in cases["play"]
+    ]
+    device_cases = [
+        (x["query"], [SimpleNamespace(**d) for d in x["devices"]], x["expected"])
+        for x in cases["device"]
+    ]
+
+    paged = set()
+
+    def replay_play(query, pages):
+        first, deeper = pages
+
+        def fetch_deeper():
+            paged.add(query)
+            return deeper
+
+        return pick(query, first, fetch_deeper)
+
+    correct = report("play", play_cases, replay_play, lambda x: x.uri, repeat)
+    print(f"play: paged deeper for {len(paged)}/{len(play_cases)} queries")
+    correct += report("device", device_cases, best_device, lambda x: x.id, repeat)
+
+    total = len(play_cases) + len(device_cases)
+    accuracy = correct / total if total else 1
+    print(f"accuracy: {accuracy:.1%}")
+    if min_accuracy is not None and accuracy < min_accuracy:
+        sys.exit(1)
+
+
+def as_candidates(results):
+    return [
+        {"name": x.name, "type": x.type, "popularity": x.popularity, "uri": x.uri}
+        for x in results
+    ]
+
+
+def get_user():
+    spock_interface = Spock()
+    user = spock_interface.state.get_user()
+    if user is None:
+        raise click.ClickException("Authentication is needed, run spock auth")
+    return spock_interface, user
+
+
+@corpus.command()
+@click.option("--path", default=CORPUS_PATH, type=click.Path(exists=True))
+@click.option("-t", "--type", "types", multiple=True, type=click.Choice(ALL_TYPES))
+@click.argument("name", nargs=-1, required=True)
+def record(path, name, types=()):
+    query = " ".join(name)
+    types = list(types) or ALL_TYPES
+    spock_interface, user = get_user()
+    spock_interface.user = user
+    candidates, fetch_deeper = spock_interface._search_pages(query, types)
+    deeper = []
+
+    def record_deeper():
+        deeper.extend(fetch_deeper())
+        return deeper
+
+    winner = pick(query, candidates, record_deeper)
+
+    case = {
+        "query": query,
+        "types": types,
+        "candidates": as_candidates(candidates),
+        "expected": winner.uri if winner else None,
+    }
+    if deeper:
+        case["deeper"] = as_candidates(deeper)
+    cases = load_corpus(path)
+    cases["play"].append(case)
+    save_corpus(path, cases)
+    print(
+        f"Recorded {len(candidates) + len(deeper)} candidates, "
+        f"check expected winner {winner}"
+    )
+
+
+@corpus.command("record-device")
+@click.option("--path", default=CORPUS_PATH, type=click.Path(exists=True))
+@click.argument("name", nargs=-1, required=True)
+def record_device(path, name):
+    query = " ".join(name)
+    _, user = get_user()
+    devices = user.playback_devices()
+    winner = best_device(query, devices)
+
+    cases = load_corpus(path)
+    cases["device"].append(
+        {
+            "query": query,
+            "devices": [{"name": x.name, "type": x.type, "id": x.id} for x in devices],
+            "expected": winner.id if winner else None,
+        }
+    )
+    save_corpus(path, cases)
+    print(f"Recorded {len(devices)} devices, check expected winner {winner}")
+
+
+if __name__ == "__main__":
+    corpus()
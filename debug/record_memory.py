@@ -0,0 +1,91 @@
+"""
+Compare memory held by a library of full tekore models against compact records
+
+1. Run script with spock installed: python debug/record_memory.py [item count]
+2. Compare the reported sizes
+"""
+
+import sys
+import tracemalloc
+from tekore.model import FullTrack
+from spock.record import Record, StringTable
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+
+def track_json(i):
+    artist = {
+        "external_urls": {
+            "spotify": f"https://open.spotify.com/artist/{i % 5000:022d}"
+        },
+        "href": f"https://api.spotify.com/v1/artists/{i % 5000:022d}",
+        "id": f"{i % 5000:022d}",
+        "name": f"Artist {i % 5000}",
+        "type": "artist",
+        "uri": f"spotify:artist:{i % 5000:022d}",
+    }
+    image = {
+        "height": 640,
+        "width": 640,
+        "url": f"https://i.scdn.co/image/{i % 10000:040d}",
+    }
+    return {
+        "album": {
+            "album_type": "album",
+            "artists": [artist],
+            "available_markets": ["CA", "US", "GB", "DE", "FR", "SE", "JP", "BR"] * 10,
+            "external_urls": {
+                "spotify": f"https://open.spotify.com/album/{i % 10000:022d}"
+            },
+            "href": f"https://api.spotify.com/v1/albums/{i % 10000:022d}",
+            "id": f"{i % 10000:022d}",
+            "images": [
+                image,
+                dict(image, height=300, width=300),
+                dict(image, height=64, width=64),
+            ],
+            "name": f"Album {i % 10000}",
+            "release_date": "2020-01-01",
+            "release_date_precision": "day",
+            "total_tracks": 10,
+            "type": "album",
+            "uri": f"spotify:album:{i % 10000:022d}",
+        },
+        "artists": [artist],
+        "available_markets": ["CA", "US", "GB", "DE", "FR", "SE", "JP", "BR"] * 10,
+        "disc_number": 1,
+        "duration_ms": 200000,
+        "explicit": False,
+        "external_ids": {"isrc": f"US{i:010d}"},
+        "external_urls": {"spotify": f"https://open.spotify.com/track/{i:022d}"},
+        "href": f"https://api.spotify.com/v1/tracks/{i:022d}",
+        "id": f"{i:022d}",
+        "is_local": False,
+        "name": f"Track {i}",
+        "popularity": i % 100,
+        "preview_url": None,
+        "track_number": i % 10 + 1,
+        "type": "track",
+        "uri": f"spotify:track:{i:022d}",
+    }
+
+
+def measure(build):
+    tracemalloc.start()
+    items = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(items), size
+
+
+models = measure(lambda: [FullTrack(**track_json(i)) for i in range(count)])
+strings = StringTable()
+records = measure(
+    lambda: [
+        Record.from_model(FullTrack(**track_json(i)), strings) for i in range(count)
+    ]
+)
+
+print(f"{models[0]} models:  {models[1] / 2 ** 20:.1f} MiB")
+print(f"{records[0]} records: {records[1] / 2 ** 20:.1f} MiB")
+print(f"reduction: {models[1] / records[1]:.1f}x")
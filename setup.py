@@ -19,7 +19,10 @@ setup(
         "keyring",
         "fuzzywuzzy[speedup]",
         "requests",
+        "httpx",
+        "httpcore",
         "importlib-resources",
+        "numpy",
     ],
     entry_points={"console_scripts": ["spock=spock.cli:spock"]},
 )
@@ -24,6 +24,8 @@ SCOPE = [
     "user-read-currently-playing",
     "playlist-read-collaborative",
     "playlist-read-private",
+    "playlist-modify-private",
+    "playlist-modify-public",
     "user-library-read",
 ]
 
@@ -141,6 +141,53 @@ def play(
         print(f"No results found for query '{query}'")
 
 
+@spock.command()
+@click.option("-n", "--count", default=50, type=click.IntRange(1, 500))
+@click.argument("seed", nargs=-1)
+@click.pass_obj
+def radio(spock_interface, seed, count=50):
+    query = " ".join(seed)
+    res = spock_interface.radio(query, count=count)
+    if res:
+        seed_track, queued = res
+        print(
+            f"Now playing {get_track_info_string(seed_track)} and {queued} similar tracks"
+        )
+    else:
+        print(f"No results found for query '{query}'")
+
+
+@spock.group()
+def playlist():
+    pass
+
+
+@playlist.command()
+@click.option("-l", "--library", is_flag=True)
+@click.option("-f", "--file", "query_file", type=click.File("r"))
+@click.option("--public", is_flag=True)
+@click.argument("name", type=click.STRING)
+@click.argument("queries", nargs=-1)
+@click.pass_obj
+def build(spock_interface, name, queries, query_file=None, library=False, public=False):
+    queries = list(queries)
+    if query_file:
+        queries.extend(line.strip() for line in query_file)
+    res = spock_interface.build_playlist(
+        name, queries, use_library=library, public=public
+    )
+    if res:
+        created, tracks, missing = res
+        for query in missing:
+            print(f"No results found for query '{query}'")
+        if created:
+            print(f"Created playlist '{created.name}' with {len(tracks)} tracks")
+        else:
+            print(f"No tracks found, playlist '{name}' was not created")
+    else:
+        print("No queries given")
+
+
 @spock.command()
 @click.option("-r", "--for-remote", is_flag=True)
 @click.option("-k", "--key")
@@ -1,3 +1,6 @@
+import os
+import click
+
 CLIENT_ID = "f95e97204b7243f98b961dfead55549d"
 
 PORT = 8081
@@ -5,3 +8,5 @@ PORT = 8081
 REDIRECT_PATH = "/authorize"
 
 REDIRECT_URI = "http://localhost:{port}{path}".format(port=PORT, path=REDIRECT_PATH)
+
+CACHE_DIR = os.environ.get("SPOCK_CACHE_DIR", click.get_app_dir("spock"))
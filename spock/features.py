@@ -0,0 +1,134 @@
+import os
+import numpy as np
+
+# audio features used for similarity, tempo and loudness are rescaled with the rest
+FEATURES = (
+    "danceability",
+    "energy",
+    "loudness",
+    "speechiness",
+    "acousticness",
+    "instrumentalness",
+    "liveness",
+    "valence",
+    "tempo",
+)
+
+# spotify ids are 22 base62 characters
+ID_DTYPE = "S22"
+
+
+def to_vector(audio_features):
+    """
+    Convert a tekore AudioFeatures model to a feature vector, all NaN if Spotify has no features.
+    """
+    if audio_features is None:
+        return np.full(len(FEATURES), np.nan, dtype=np.float32)
+    return np.array(
+        [getattr(audio_features, name) for name in FEATURES], dtype=np.float32
+    )
+
+
+def id_mask(ids, track_ids):
+    """
+    :return: boolean mask of the entries of ids that are in track_ids
+    """
+    return np.isin(ids, np.array(track_ids, dtype=ID_DTYPE))
+
+
+class FeatureCache:
+    """
+    Stores audio features on disk as a float32 matrix with a matching array of track ids.
+    Loaded arrays are memory mapped so large libraries are not read up front.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.ids_path = os.path.join(directory, "feature_ids.npy")
+        self.features_path = os.path.join(directory, "features.npy")
+
+    def load(self):
+        """
+        :return: (ids, features), empty arrays if nothing has been cached
+        """
+        try:
+            ids = np.load(self.ids_path, mmap_mode="r")
+            features = np.load(self.features_path, mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            ids, features = None, None
+
+        # treat a missing, partially written or outdated cache as empty
+        if (
+            ids is None
+            or len(ids) != len(features)
+            or features.shape[1:] != (len(FEATURES),)
+        ):
+            ids = np.empty(0, dtype=ID_DTYPE)
+            features = np.empty((0, len(FEATURES)), dtype=np.float32)
+        return ids, features
+
+    def update(self, track_ids, fetch):
+        """
+        Load the cache, fetching and storing features for any track ids that are not in it yet
+        :param fetch: Called with the missing track ids, returns one feature vector per id
+        :return: (ids, features)
+        """
+        ids, features = self.load()
+        known = set(ids.tolist())
+        missing = [x for x in dict.fromkeys(track_ids) if x.encode() not in known]
+        if not missing:
+            return ids, features
+
+        # concatenate copies out of the memory maps, rebinding drops the last
+        # references to them so the files can be replaced
+        new_features = np.asarray(fetch(missing), dtype=np.float32)
+        ids = np.concatenate([ids, np.array(missing, dtype=ID_DTYPE)])
+        features = np.concatenate([features, new_features.reshape(-1, len(FEATURES))])
+
+        os.makedirs(self.directory, exist_ok=True)
+        # each file is replaced atomically, load() discards a pair whose lengths differ
+        self._save(self.features_path, features)
+        self._save(self.ids_path, ids)
+        return ids, features
+
+    def _save(self, path, array):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            np.save(file, array)
+        os.replace(tmp_path, path)
+
+
+def most_similar(features, seed, count, candidates=None):
+    """
+    Rank rows of features by cosine similarity to seed after standardizing each feature
+    :param features: (n, len(FEATURES)) matrix
+    :param seed: feature vector to compare against
+    :param count: maximum number of rows to return
+    :param candidates: optional boolean mask of rows that may be returned
+    :return: row indices ordered from most to least similar
+    """
+    features = np.asarray(features, dtype=np.float32)
+    valid = ~np.isnan(features).any(axis=1)
+    if candidates is not None:
+        valid &= candidates
+    if not valid.any() or np.isnan(seed).any():
+        return np.empty(0, dtype=np.intp)
+
+    mean = features[valid].mean(axis=0)
+    std = features[valid].std(axis=0)
+    std[std == 0] = 1
+
+    normalized = (features - mean) / std
+    norms = np.linalg.norm(normalized, axis=1)
+    norms[norms == 0] = 1
+    seed = (np.asarray(seed, dtype=np.float32) - mean) / std
+    seed_norm = np.linalg.norm(seed) or 1
+
+    scores = normalized @ seed / (norms * seed_norm)
+    scores[~valid] = -np.inf
+
+    count = min(count, int(valid.sum()))
+    if count <= 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(-scores, count - 1)[:count]
+    return top[np.argsort(-scores[top])]
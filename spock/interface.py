@@ -2,24 +2,41 @@ import click
 import tekore as tk
 from tekore.model import Device, RepeatState
 from spock.state import State
+from spock.record import Record, StringTable
+from spock.match import best_match, best_device, pick, NameIndex
 from spock.authenticate import (
     authenticate,
     authenticate_with_key,
     authenticate_for_remote,
 )
 from functools import wraps
-from fuzzywuzzy import fuzz
+from concurrent.futures import ThreadPoolExecutor
 import itertools
-from spock.config import CLIENT_ID
+from spock.config import CLIENT_ID, CACHE_DIR
+
+SEARCH_WORKERS = 8
+SEARCH_LIMIT = 5
+SEARCH_TYPE_LIMIT = 20
+SEARCH_DEEP_LIMIT = 50
+# spotify rejects searches where offset + limit exceeds 1000
+SEARCH_MAX_OFFSET = 1000
+# cap on requests per query, including the first page
+SEARCH_MAX_REQUESTS = 4
+PLAYLIST_ADD_LIMIT = 100
+AUDIO_FEATURES_LIMIT = 100
 
 
 def get_track_info_string(result):
+    if not isinstance(result, Record):
+        result = Record.from_model(result)
     if result.type == "track":
-        return f"{result.type} '{result.name}' from '{result.album.name}' by '{', '.join(map(lambda x: x.name, result.artists))}'"
+        return (
+            f"{result.type} '{result.name}' from '{result.album}' by '{result.artists}'"
+        )
     if result.type == "album":
-        return f"{result.type} '{result.name}' by '{', '.join(map(lambda x: x.name, result.artists))}'"
+        return f"{result.type} '{result.name}' by '{result.artists}'"
     elif result.type == "playlist":
-        ret = f"{result.type} '{result.name}' by {result.owner.display_name}"
+        ret = f"{result.type} '{result.name}' by {result.owner}"
         if result.description:
             ret += f': "{result.description}"'
         return ret
@@ -116,15 +133,10 @@ class Spock:
             self.user.playback_transfer(device.id, force_play=True)
             return device
 
-        device_list = self.user.playback_devices()
-        # find closest named device looking at name and type
-        # e.g. name='Web Player (Chrome)', type='Computer'
-        scorer = lambda dev: fuzz.partial_ratio(device, f"{dev.name} {dev.type}")
-        best_device = max(device_list, key=scorer)
-        score = scorer(best_device)
-        if best_device and score > 50:
-            self.user.playback_transfer(best_device.id, force_play=True)
-            return best_device
+        dev = best_device(device, self.user.playback_devices())
+        if dev:
+            self.user.playback_transfer(dev.id, force_play=True)
+            return dev
 
     @check_auth
     def use_device_by_id(self, dev_id):
@@ -160,40 +172,12 @@ class Spock:
 
         # source from user library
         if use_library:
-            results = []
-            if "playlist" in types:
-                results.extend(
-                    self.user.all_items(
-                        self.user.playlists(self.user.current_user().id)
-                    )
-                )
-            if "album" in types:
-                results.extend(
-                    [x.album for x in self.user.all_items(self.user.saved_albums())]
-                )
-            if "track" in types:
-                results.extend(
-                    [x.track for x in self.user.all_items(self.user.saved_tracks())]
-                )
+            best_result = best_match(query, self._library_items(types))
         # source from global search
         else:
-            # flatten results across different categories into list
-            results = list(
-                itertools.chain(
-                    *[list(x.items) for x in self.user.search(query, types, limit=5)]
-                )
-            )
+            best_result = self._search(query, types)
 
-        # find best match irrespective of category by name
-        scorer = (
-            lambda x: 0
-            if x is None
-            else fuzz.ratio(query.lower(), ascii(x.name).lower())
-            + (x.popularity if x.type in ["track", "artist"] else 0)
-        )
-        best_result = max(results, key=scorer, default=None)
-        score = scorer(best_result)
-        if score < 50:
+        if best_result is None:
             return
 
         if best_result.type == "track":
@@ -203,6 +187,178 @@ class Spock:
 
         return best_result
 
+    @check_auth
+    def build_playlist(self, name, queries, use_library=False, public=False):
+        """
+        Resolve each query to a track and collect the matches into a new playlist
+        :param name: Name of the playlist to create
+        :param queries: Iterable of track queries
+        :param use_library: Match against saved tracks instead of global search
+        :param public: Whether the new playlist is public
+        :return: (playlist, tracks added, queries with no match), playlist is None
+            if nothing matched and no playlist was created
+        """
+        queries = [query for query in queries if query]
+        if not queries:
+            return
+
+        if use_library:
+            # only fuzzy score saved tracks that share a name or word with each query
+            index = NameIndex(self._library_items(["track"]))
+            matches = [index.best_match(query) for query in queries]
+        else:
+            # searches are independent reads so resolve them concurrently
+            with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+                matches = list(
+                    executor.map(lambda query: self._search(query, ["track"]), queries)
+                )
+
+        # deduplicate by uri while keeping query order
+        tracks = list({x.uri: x for x in matches if x is not None}.values())
+        missing = [query for query, x in zip(queries, matches) if x is None]
+        if not tracks:
+            return None, tracks, missing
+
+        playlist = self.user.playlist_create(
+            self.user.current_user().id, name, public=public
+        )
+        # writes must stay in order, rate limiting is handled by the sender
+        uris = [x.uri for x in tracks]
+        for i in range(0, len(uris), PLAYLIST_ADD_LIMIT):
+            self.user.playlist_add(playlist.id, uris[i : i + PLAYLIST_ADD_LIMIT])
+
+        return playlist, tracks, missing
+
+    @check_auth
+    def radio(self, seed, count=50):
+        """
+        Play the seed track followed by the saved tracks that sound most like it
+        :param seed: Track query, matched against saved tracks before global search
+        :param count: Number of tracks to queue after the seed
+        :return: (seed track, number of tracks queued)
+        """
+        # numpy is only needed here, keep it off the import path of other commands
+        from spock.features import FeatureCache, id_mask, most_similar, to_vector
+
+        if not seed:
+            return
+        if isinstance(seed, list):
+            seed = " ".join(seed)
+
+        # local files have no id and so no audio features
+        library = [x for x in self._library_items(["track"]) if x.id]
+        seed_track = best_match(seed, library) or self._search(seed, ["track"])
+        if seed_track is None or not seed_track.id:
+            return
+
+        library_ids = [x.id for x in library]
+        ids, features = FeatureCache(CACHE_DIR).update(
+            library_ids + [seed_track.id],
+            lambda missing: [to_vector(x) for x in self._audio_features(missing)],
+        )
+
+        seed_index = id_mask(ids, [seed_track.id]).argmax()
+        candidates = id_mask(ids, library_ids)
+        candidates[seed_index] = False
+        queue = most_similar(features, features[seed_index], count, candidates)
+
+        track_ids = [seed_track.id] + [ids[i].decode() for i in queue]
+        self.user.playback_start_tracks(track_ids)
+
+        return seed_track, len(queue)
+
+    def _audio_features(self, track_ids):
+        chunks = [
+            track_ids[i : i + AUDIO_FEATURES_LIMIT]
+            for i in range(0, len(track_ids), AUDIO_FEATURES_LIMIT)
+        ]
+        with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+            return list(
+                itertools.chain(*executor.map(self.user.tracks_audio_features, chunks))
+            )
+
+    def _library_items(self, types):
+        # convert while paging so full models are dropped one page at a time
+        strings = StringTable()
+        results = []
+        if "playlist" in types:
+            results.extend(
+                Record.from_model(x, strings)
+                for x in self.user.all_items(
+                    self.user.playlists(self.user.current_user().id)
+                )
+            )
+        if "album" in types:
+            results.extend(
+                Record.from_model(x.album, strings)
+                for x in self.user.all_items(self.user.saved_albums())
+            )
+        if "track" in types:
+            results.extend(
+                Record.from_model(x.track, strings)
+                for x in self.user.all_items(self.user.saved_tracks())
+            )
+        return results
+
+    def _search(self, query, types):
+        """
+        Search for the best match, only paging deeper into the results when
+        no name on the first page is close to the query
+        :return: None if nothing is a close enough match
+        """
+        return pick(query, *self._search_pages(query, types))
+
+    def _search_pages(self, query, types):
+        """
+        Fetch the first page of results for query
+        :return: (first page results, function fetching further pages in parallel)
+        """
+        # a single type can afford a bigger first page for the same one request
+        limit = SEARCH_TYPE_LIMIT if len(types) == 1 else SEARCH_LIMIT
+        pages = self.user.search(query, types, limit=limit)
+
+        # only page into types that have more results than were returned,
+        # tekore orders pages as in the response so key them by their items
+        total = {self._page_type(page): page.total for page in pages}
+        deep_types = [x for x in types if total.get(x, 0) > limit]
+
+        def search_page(offset):
+            page_types = [x for x in deep_types if total[x] > offset]
+            return self._flatten(
+                self.user.search(
+                    query, page_types, limit=SEARCH_DEEP_LIMIT, offset=offset
+                )
+            )
+
+        def fetch_deeper():
+            offsets = [
+                offset
+                for offset in range(
+                    limit, SEARCH_MAX_OFFSET - SEARCH_DEEP_LIMIT + 1, SEARCH_DEEP_LIMIT
+                )
+                if any(total[x] > offset for x in deep_types)
+            ][: SEARCH_MAX_REQUESTS - 1]
+            if not offsets:
+                return []
+            with ThreadPoolExecutor(max_workers=len(offsets)) as executor:
+                return list(itertools.chain(*executor.map(search_page, offsets)))
+
+        return self._flatten(pages), fetch_deeper
+
+    @staticmethod
+    def _page_type(page):
+        # an empty first page has no items but also nothing deeper to fetch
+        return next((x.type for x in page.items if x is not None), None)
+
+    @staticmethod
+    def _flatten(pages):
+        # flatten results across different categories into list
+        return [
+            Record.from_model(x)
+            for x in itertools.chain(*[x.items for x in pages])
+            if x is not None
+        ]
+
     def auth(self, remote=False):
 
         if not remote:
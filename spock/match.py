@@ -0,0 +1,111 @@
+import itertools
+import re
+import unicodedata
+from fuzzywuzzy import fuzz
+
+MATCH_THRESHOLD = 50
+# name similarity at which a result is considered the thing the user asked for
+CONFIDENT_NAME_SCORE = 80
+DEVICE_THRESHOLD = 50
+# words shared by more names than this (e.g. "the", "remastered") don't narrow candidates
+COMMON_WORD_LIMIT = 1000
+
+
+def name_score(query, result):
+    """
+    Similarity between the query and a result's name from 0 to 100, ignoring popularity
+    """
+    return fuzz.ratio(query.lower(), ascii(result.name).lower())
+
+
+def confident_results(query, results):
+    """
+    Results whose name alone is close enough to the query to be what the user asked for
+    """
+    return [
+        x
+        for x in results
+        if x is not None and name_score(query, x) >= CONFIDENT_NAME_SCORE
+    ]
+
+
+def best_match(query, results):
+    """
+    Find best match irrespective of category by name
+    :param results: Records or tekore models with name, type and popularity
+    :return: None if no result scores at least MATCH_THRESHOLD
+    """
+    scorer = (
+        lambda x: 0
+        if x is None
+        else name_score(query, x)
+        + (x.popularity if x.type in ["track", "artist"] else 0)
+    )
+    best_result = max(results, key=scorer, default=None)
+    if scorer(best_result) < MATCH_THRESHOLD:
+        return
+    return best_result
+
+
+def pick(query, results, fetch_deeper=None):
+    """
+    Choose the winner among search results. The first page is ranked as a whole when a name on
+    it is a confident match, otherwise deeper results are brought in and only confident names
+    compete so a popular result can't outrank the name the user asked for.
+    :param results: First page of results
+    :param fetch_deeper: Called without arguments for results past the first page, only when needed
+    :return: None if nothing is a close enough match
+    """
+    # popularity alone can pass the match threshold, so judge by name
+    if fetch_deeper is None or confident_results(query, results):
+        return best_match(query, results)
+    results = list(results) + list(fetch_deeper())
+    return best_match(query, confident_results(query, results) or results)
+
+
+def _words(text):
+    # fold accents so "beyonce" and "Beyoncé" share a word
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.findall(r"\w+", text)
+
+
+class NameIndex:
+    """
+    Narrows a large list of results to those worth fuzzy scoring against a query. Exact name
+    matches are used when there are any, otherwise results sharing a word with the query.
+    """
+
+    def __init__(self, results):
+        self.names = {}
+        self.words = {}
+        for x in results:
+            words = _words(x.name)
+            self.names.setdefault(" ".join(words), []).append(x)
+            for word in set(words):
+                self.words.setdefault(word, []).append(x)
+
+    def candidates(self, query):
+        words = _words(query)
+        exact = self.names.get(" ".join(words))
+        if exact:
+            return exact
+
+        postings = [self.words[x] for x in set(words) if x in self.words]
+        rare = [x for x in postings if len(x) <= COMMON_WORD_LIMIT]
+        return list({id(x): x for x in itertools.chain(*(rare or postings))}.values())
+
+    def best_match(self, query):
+        return best_match(query, self.candidates(query))
+
+
+def best_device(query, devices):
+    """
+    Find closest named device looking at name and type
+    e.g. name='Web Player (Chrome)', type='Computer'
+    :return: None if no device scores above DEVICE_THRESHOLD
+    """
+    scorer = lambda dev: fuzz.partial_ratio(query, f"{dev.name} {dev.type}")
+    device = max(devices, key=scorer, default=None)
+    if device and scorer(device) > DEVICE_THRESHOLD:
+        return device
@@ -0,0 +1,84 @@
+class StringTable:
+    """
+    Keeps a single copy of each string so records can share repeated values like artist and album names.
+    """
+
+    __slots__ = ("strings",)
+
+    def __init__(self):
+        self.strings = {}
+
+    def __call__(self, value):
+        if value is None:
+            return None
+        return self.strings.setdefault(value, value)
+
+
+def _keep(value):
+    return value
+
+
+class Record:
+    """
+    Compact stand-in for a tekore track, album, artist or playlist model. Holds only what is needed
+    to rank, play and describe a result so the full model can be dropped as soon as it is parsed.
+    """
+
+    __slots__ = (
+        "name",
+        "type",
+        "popularity",
+        "id",
+        "uri",
+        "artists",
+        "album",
+        "owner",
+        "description",
+    )
+
+    def __init__(
+        self,
+        name,
+        type,
+        popularity=None,
+        id=None,
+        uri=None,
+        artists=None,
+        album=None,
+        owner=None,
+        description=None,
+    ):
+        self.name = name
+        self.type = type
+        self.popularity = popularity
+        self.id = id
+        self.uri = uri
+        self.artists = artists
+        self.album = album
+        self.owner = owner
+        self.description = description
+
+    @classmethod
+    def from_model(cls, model, strings=None):
+        """
+        :param model: tekore model to convert
+        :param strings: Optional StringTable to share repeated names between records
+        """
+        intern = strings or _keep
+        artists = getattr(model, "artists", None)
+        album = getattr(model, "album", None)
+        owner = getattr(model, "owner", None)
+        return cls(
+            name=model.name,
+            type=model.type,
+            popularity=getattr(model, "popularity", None),
+            id=model.id,
+            uri=model.uri,
+            artists=intern(", ".join(x.name for x in artists)) if artists else None,
+            album=intern(album.name) if album else None,
+            owner=intern(owner.display_name) if owner else None,
+            description=getattr(model, "description", None) or None,
+        )
+
+    def __repr__(self):
+        return f"Record(type={self.type!r}, name={self.name!r}, uri={self.uri!r})"
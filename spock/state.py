@@ -2,8 +2,30 @@ import os
 import tekore as tk
 import keyring
 
+from spock.transport import get_sender
+
 KEYRING_SERVICE_NAME = "spock"
 
+# retries for server errors on reads, rate limited requests wait out Retry-After
+REQUEST_RETRIES = 3
+
+
+class RateLimitedSender(tk.ExtendingSender):
+    """
+    Waits out rate limits on every request but only retries server errors for GET requests,
+    a write that failed with a server error may still have been applied.
+    """
+
+    def __init__(self, retries=0, sender=None):
+        super().__init__(sender)
+        self.reads = tk.RetryingSender(retries=retries, sender=self.sender)
+        self.writes = tk.RetryingSender(sender=self.sender)
+
+    def send(self, request):
+        if request.method == "GET":
+            return self.reads.send(request)
+        return self.writes.send(request)
+
 
 class State:
     def __init__(self, default_client_id):
@@ -16,11 +38,17 @@ class State:
         """
         refresh_token = self.get_refresh_token()
         if refresh_token:
-            creds = tk.Credentials(client_id=self.client_id)
+            # connects to the API host while the token is refreshed, requests to
+            # either host are retried once with fresh DNS lookups if connecting fails
+            sender = get_sender()
+            creds = tk.Credentials(client_id=self.client_id, sender=sender)
             try:
                 new_token = creds.refresh_pkce_token(refresh_token)
                 self.set_refresh_token(new_token.refresh_token)
-                return tk.Spotify(new_token)
+                return tk.Spotify(
+                    new_token,
+                    sender=RateLimitedSender(retries=REQUEST_RETRIES, sender=sender),
+                )
             except tk.BadRequest:
                 self.remove_refresh_token()
         return None
@@ -0,0 +1,179 @@
+import json
+import os
+import socket
+import threading
+import time
+import httpcore
+import httpx
+import tekore as tk
+
+from spock.config import CACHE_DIR
+
+ACCOUNTS_HOST = "accounts.spotify.com"
+API_HOST = "api.spotify.com"
+
+# spotify records are short lived, don't trust a cached address for longer
+DNS_TTL = 300
+
+# raised before a request is sent, usually because a cached address stopped answering
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+class DnsCache:
+    """
+    Persists getaddrinfo results for a few hosts so short lived invocations can skip the lookup.
+    """
+
+    def __init__(self, path, hosts=(ACCOUNTS_HOST, API_HOST), ttl=DNS_TTL):
+        self.path = path
+        self.hosts = hosts
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path) as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            entries = {}
+        now = time.time()
+        self.entries = {
+            key: entry
+            for key, entry in entries.items()
+            if isinstance(entry, dict) and entry.get("expires", 0) > now
+        }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self.entries, file)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        with self.lock:
+            self.entries = {}
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def resolve(self, host, port):
+        """
+        :return: addresses for host, from disk when cached, None for hosts this cache doesn't cover
+        """
+        if host not in self.hosts:
+            return None
+
+        key = f"{host}:{port}"
+        entry = self.entries.get(key)
+        if entry and entry["expires"] > time.time():
+            return entry["addresses"]
+
+        try:
+            infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except OSError:
+            # let the normal connect path raise its usual error
+            return None
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self.lock:
+            self.entries[key] = {
+                "expires": time.time() + self.ttl,
+                "addresses": addresses,
+            }
+            try:
+                self.save()
+            except OSError:
+                # caching is best effort, the lookup itself succeeded
+                pass
+        return addresses
+
+
+class CachingBackend(getattr(httpcore, "SyncBackend", object)):
+    """
+    Network backend that connects to the addresses held by a DnsCache. TLS is unaffected,
+    httpcore verifies the certificate against the request's host name, not the address.
+    """
+
+    def __init__(self, dns_cache):
+        super().__init__()
+        self.dns_cache = dns_cache
+
+    def connect_tcp(self, host, port, *args, **kwargs):
+        addresses = self.dns_cache.resolve(host, port) or [host]
+        for address in addresses[:-1]:
+            try:
+                return super().connect_tcp(address, port, *args, **kwargs)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout):
+                pass
+        return super().connect_tcp(addresses[-1], port, *args, **kwargs)
+
+
+def use_dns_cache(client):
+    """
+    Make client connect through the DNS cache. httpx has no public option for the network
+    backend, so it is swapped on the pool behind direct connections. If the httpx or httpcore
+    internals this relies on have changed the client is left as is.
+    """
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    if (
+        not hasattr(httpcore, "SyncBackend")
+        or not isinstance(pool, httpcore.ConnectionPool)
+        or not isinstance(getattr(pool, "_network_backend", None), httpcore.SyncBackend)
+    ):
+        return
+    pool._network_backend = CachingBackend(dns_cache)
+
+
+dns_cache = None
+
+
+def get_sender():
+    """
+    Create a sender whose connections are shared by every request in this process. Addresses
+    for the Spotify hosts come from the on disk cache and a connection to the API host is opened
+    in the background so it is ready by the time the access token has been refreshed.
+    """
+    global dns_cache
+    if dns_cache is None:
+        dns_cache = DnsCache(os.path.join(CACHE_DIR, "dns.json"))
+        dns_cache.load()
+
+    client = httpx.Client()
+    # only this client resolves through the cache, proxied requests are left alone
+    use_dns_cache(client)
+    threading.Thread(target=warm_up, args=(client, API_HOST), daemon=True).start()
+    return ReconnectingSender(tk.SyncSender(client=client))
+
+
+class ReconnectingSender(tk.ExtendingSender):
+    """
+    Retries a request once with fresh DNS lookups if connecting failed. The request was never
+    sent in that case, so retrying is safe for any method.
+    """
+
+    def send(self, request):
+        try:
+            return self.sender.send(request)
+        except CONNECT_ERRORS:
+            clear_dns_cache()
+            return self.sender.send(request)
+
+
+def warm_up(client, host):
+    """
+    Open a pooled connection to host, the response itself is ignored.
+    """
+    try:
+        client.head(f"https://{host}/")
+    except CONNECT_ERRORS:
+        # a stale cached address is the likely culprit, look it up again next time
+        clear_dns_cache()
+    except httpx.HTTPError:
+        pass
+
+
+def clear_dns_cache():
+    if dns_cache is not None:
+        dns_cache.clear()